@@ -1,45 +1,122 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from cachetools import TTLCache
+import orjson
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, select, delete, func, event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from pydantic import BaseModel, Field
+from sqlalchemy.orm import raiseload
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.ext.compiler import compiles
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Optional, List
+from contextlib import asynccontextmanager
 from datetime import datetime
+from enum import Enum
+import hashlib
 import os
 
 # Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tasks.db")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./tasks.db")
+
+# Map plain driver URLs (e.g. from the hosting platform) onto async drivers
+if DATABASE_URL.startswith("sqlite://"):
+    DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+elif DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
+elif DATABASE_URL.startswith("postgresql://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    # In-memory databases live on a single connection, so it must be shared
+    # across sessions; file databases keep SQLAlchemy's pooled default.
+    sqlite_pool = {"poolclass": StaticPool} if ":memory:" in DATABASE_URL else {}
+    engine = create_async_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **sqlite_pool,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers proceed during writes; NORMAL sync avoids an fsync per commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_async_engine(
+        DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        query_cache_size=1200,
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
+class utcnow(FunctionElement):
+    """Current UTC time computed by the database, with sub-second precision."""
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utcnow, "sqlite")
+def sqlite_utcnow(element, compiler, **kw):
+    # CURRENT_TIMESTAMP only has whole seconds on SQLite
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+@compiles(utcnow, "postgresql")
+def postgresql_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
 # SQLAlchemy Model
 class TaskModel(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_completed_priority", "completed", "priority"),
+        Index("ix_tasks_completed", "completed"),
+    )
+    # Fetch the database-generated timestamps in the INSERT/UPDATE itself
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(String(1000), nullable=True)
     completed = Column(Boolean, default=False)
     priority = Column(String(20), default="medium")
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+    # default= renders the same expression into each INSERT, so tables created
+    # before the server default existed still get timestamps
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
 
 # Pydantic Models
+class Priority(str, Enum):
+    low = "low"
+    medium = "medium"
+    high = "high"
+
 class TaskBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=255, description="Task title")
     description: Optional[str] = Field(None, max_length=1000, description="Task description")
     completed: bool = Field(False, description="Task completion status")
-    priority: str = Field("medium", pattern="^(low|medium|high)$", description="Task priority")
+    priority: Priority = Field(Priority.medium.value, description="Task priority")
+
+    class Config:
+        use_enum_values = True
 
 class TaskCreate(TaskBase):
     pass
@@ -48,7 +125,10 @@ class TaskUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = Field(None, max_length=1000)
     completed: Optional[bool] = None
-    priority: Optional[str] = Field(None, pattern="^(low|medium|high)$")
+    priority: Optional[Priority] = None
+
+    class Config:
+        use_enum_values = True
 
 class TaskResponse(TaskBase):
     id: int
@@ -61,6 +141,42 @@ class TaskResponse(TaskBase):
 class TaskListResponse(BaseModel):
     total: int
     tasks: List[TaskResponse]
+    next_cursor: Optional[int] = None
+
+# Validates and dumps a whole page of tasks in one call
+TASK_LIST_ADAPTER = TypeAdapter(List[TaskResponse])
+
+# Per-process cache for GET /tasks/{id}; other workers' writes only show up
+# once entries expire, so it is opt-in
+TASK_CACHE_ENABLED = os.getenv("TASK_CACHE_ENABLED") == "1"
+TASK_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+# Bumped on every write so a read that started before the write does not
+# put the old row back after it has been evicted
+TASK_CACHE_EPOCH = 0
+
+def invalidate_task_cache(task_id: Optional[int] = None):
+    """Evict one cached task, or all of them when no id is given."""
+    global TASK_CACHE_EPOCH
+    TASK_CACHE_EPOCH += 1
+    if task_id is None:
+        TASK_CACHE.clear()
+    else:
+        TASK_CACHE.pop(task_id, None)
+
+# Create tables. Schema introspection on every worker boot is wasted work
+# once tables exist, so only local SQLite does it unless DB_AUTOCREATE=1.
+DB_AUTOCREATE = os.getenv("DB_AUTOCREATE", "1" if DATABASE_URL.startswith("sqlite") else "0") == "1"
+
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_AUTOCREATE:
+        await create_tables()
+    yield
+    await engine.dispose()
 
 # FastAPI App
 app = FastAPI(
@@ -68,7 +184,9 @@ app = FastAPI(
     description="A complete REST API for managing tasks. Built by Yongskie with FastAPI + SQLite.",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -80,17 +198,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses such as full task pages
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+def task_etag(body: dict) -> str:
+    """Weak ETag hashed from the serialized task, so any change to it changes the tag."""
+    return f'W/"{hashlib.blake2b(orjson.dumps(body), digest_size=8).hexdigest()}"'
+
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Root endpoint
 @app.get("/", tags=["Health"])
-def root():
+async def root():
     return {
         "message": "Welcome to Tasks API! 🚀",
         "docs": "/docs",
@@ -100,58 +222,120 @@ def root():
 
 # Health check
 @app.get("/health", tags=["Health"])
-def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+async def health_check():
+    return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 # CREATE - POST /tasks
-@app.post("/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED, tags=["Tasks"])
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
+@app.post("/tasks", responses={201: {"model": TaskResponse}}, status_code=status.HTTP_201_CREATED, tags=["Tasks"])
+async def create_task(task: TaskCreate, db: AsyncSession = Depends(get_db)):
     """Create a new task."""
     db_task = TaskModel(**task.model_dump())
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    await db.commit()
+    await db.refresh(db_task)
+    return ORJSONResponse(TaskResponse.model_validate(db_task).model_dump(), status_code=status.HTTP_201_CREATED)
+
+# CREATE MANY - POST /tasks/bulk
+@app.post("/tasks/bulk", responses={201: {"model": List[TaskResponse]}}, status_code=status.HTTP_201_CREATED, tags=["Tasks"])
+async def create_tasks_bulk(tasks: List[TaskCreate], db: AsyncSession = Depends(get_db)):
+    """Create several tasks in a single transaction."""
+    db_tasks = [TaskModel(**task.model_dump()) for task in tasks]
+    db.add_all(db_tasks)
+    await db.commit()
+    task_list = TASK_LIST_ADAPTER.dump_python(TASK_LIST_ADAPTER.validate_python(db_tasks))
+    return ORJSONResponse(task_list, status_code=status.HTTP_201_CREATED)
 
 # READ ALL - GET /tasks
-@app.get("/tasks", response_model=TaskListResponse, tags=["Tasks"])
-def get_tasks(
+@app.get("/tasks", responses={200: {"model": TaskListResponse}}, tags=["Tasks"])
+async def get_tasks(
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = None,
     completed: Optional[bool] = None,
-    priority: Optional[str] = None,
-    db: Session = Depends(get_db)
+    priority: Optional[Priority] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all tasks with optional filtering."""
-    query = db.query(TaskModel)
-    
+    """Get all tasks with optional filtering.
+
+    Pass `after` (the previous page's `next_cursor`) for keyset pagination;
+    `skip` is still honoured when no cursor is given.
+    """
+    filters = []
     if completed is not None:
-        query = query.filter(TaskModel.completed == completed)
+        filters.append(TaskModel.completed == completed)
     if priority:
-        query = query.filter(TaskModel.priority == priority)
+        filters.append(TaskModel.priority == priority.value)
+    
+    # Plain columns instead of ORM entities: listing is read-only, so skip
+    # instance construction and identity-map bookkeeping
+    columns = (
+        TaskModel.id,
+        TaskModel.title,
+        TaskModel.description,
+        TaskModel.completed,
+        TaskModel.priority,
+        TaskModel.created_at,
+        TaskModel.updated_at,
+    )
     
-    total = query.count()
-    tasks = query.offset(skip).limit(limit).all()
+    if after is not None:
+        # The cursor narrows the rows, so count the filtered set in a subquery
+        total_column = select(func.count()).select_from(TaskModel).where(*filters).scalar_subquery()
+        query = select(*columns, total_column.label("total")).where(*filters, TaskModel.id > after)
+    else:
+        # The window function returns the filtered total alongside each row
+        query = select(*columns, func.count().over().label("total")).where(*filters).offset(skip)
     
-    return {"total": total, "tasks": tasks}
+    result = await db.execute(query.order_by(TaskModel.id).limit(limit))
+    tasks = result.mappings().all()
+    
+    if tasks:
+        total = tasks[0]["total"]
+    else:
+        # An empty page (past the end, or limit=0) carries no total
+        total = await db.scalar(select(func.count()).select_from(TaskModel).where(*filters))
+    
+    next_cursor = tasks[-1]["id"] if tasks else None
+    task_list = TASK_LIST_ADAPTER.dump_python(TASK_LIST_ADAPTER.validate_python(tasks))
+    return ORJSONResponse({"total": total, "tasks": task_list, "next_cursor": next_cursor})
 
 # READ ONE - GET /tasks/{id}
-@app.get("/tasks/{task_id}", response_model=TaskResponse, tags=["Tasks"])
-def get_task(task_id: int, db: Session = Depends(get_db)):
-    """Get a specific task by ID."""
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Task with id {task_id} not found"
-        )
-    return task
+@app.get("/tasks/{task_id}", responses={200: {"model": TaskResponse}}, tags=["Tasks"])
+async def get_task(task_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get a specific task by ID.
+
+    Responds with 304 Not Modified when `If-None-Match` carries the current ETag.
+    """
+    cached = TASK_CACHE.get(task_id) if TASK_CACHE_ENABLED else None
+    if cached:
+        etag, body = cached
+    else:
+        epoch = TASK_CACHE_EPOCH
+        # Serializing the task must never trigger lazy loads; when relationships
+        # are added, eager-load them explicitly ahead of raiseload("*")
+        task = await db.get(TaskModel, task_id, options=[raiseload("*")])
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Task with id {task_id} not found"
+            )
+        
+        body = TaskResponse.model_validate(task).model_dump()
+        etag = task_etag(body)
+        if TASK_CACHE_ENABLED and epoch == TASK_CACHE_EPOCH:
+            TASK_CACHE[task_id] = (etag, body)
+    
+    if_none_match = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if "*" in if_none_match or etag in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return ORJSONResponse(body, headers={"ETag": etag})
 
 # UPDATE - PUT /tasks/{id}
-@app.put("/tasks/{task_id}", response_model=TaskResponse, tags=["Tasks"])
-def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get_db)):
+@app.put("/tasks/{task_id}", responses={200: {"model": TaskResponse}}, tags=["Tasks"])
+async def update_task(task_id: int, task_update: TaskUpdate, db: AsyncSession = Depends(get_db)):
     """Update an existing task."""
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+    task = await db.get(TaskModel, task_id, options=[raiseload("*")])
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,29 +346,61 @@ def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get
     for field, value in update_data.items():
         setattr(task, field, value)
     
-    db.commit()
-    db.refresh(task)
-    return task
+    await db.commit()
+    await db.refresh(task)
+    invalidate_task_cache(task_id)
+    return ORJSONResponse(TaskResponse.model_validate(task).model_dump())
 
 # DELETE - DELETE /tasks/{id}
 @app.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Tasks"])
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a task."""
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+    task = await db.get(TaskModel, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Task with id {task_id} not found"
         )
     
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
+    invalidate_task_cache(task_id)
     return None
 
 # Batch operations
 @app.delete("/tasks", status_code=status.HTTP_200_OK, tags=["Tasks"])
-def delete_completed_tasks(db: Session = Depends(get_db)):
+async def delete_completed_tasks(db: AsyncSession = Depends(get_db)):
     """Delete all completed tasks."""
-    deleted = db.query(TaskModel).filter(TaskModel.completed == True).delete()
-    db.commit()
-    return {"message": f"Deleted {deleted} completed tasks"}
+    # Skip session synchronization so matched rows are never loaded into the identity map
+    stmt = delete(TaskModel).where(TaskModel.completed == True).execution_options(synchronize_session=False)
+    result = await db.execute(stmt)
+    await db.commit()
+    invalidate_task_cache()
+    return {"message": f"Deleted {result.rowcount} completed tasks"}
+
+# Production entry point: `python main.py`. Endpoints are async, so one
+# worker already serves many requests concurrently; extra workers add CPU
+# parallelism. Override the count with WEB_CONCURRENCY.
+if __name__ == "__main__":
+    import asyncio
+    import uvicorn
+
+    async def create_tables_once():
+        await create_tables()
+        await engine.dispose()
+
+    # Create tables once here; workers would otherwise race on CREATE TABLE
+    # in their lifespan hooks. They inherit DB_AUTOCREATE=0 and skip it.
+    if DB_AUTOCREATE:
+        asyncio.run(create_tables_once())
+        os.environ["DB_AUTOCREATE"] = "0"
+
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", str(max(1, (os.cpu_count() or 1) * 2 + 1)))),
+        loop="uvloop",
+        http="httptools",
+        log_level="info",
+    )